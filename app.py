@@ -1,10 +1,27 @@
+import orjson
 from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event, func, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from models import db, Wine, Store, WineRating
 from trusted_wine_scraper import TrustedWineScraper
 from drinking_window_service import DrinkingWindowService
 import os
+import threading
+import time
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson for faster (de)serialization"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///wine_cellar.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -13,6 +30,133 @@ db.init_app(app)
 scraper = TrustedWineScraper()
 drinking_window_service = DrinkingWindowService()
 
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite on every new connection: WAL so readers don't block
+    writers, relaxed fsync, and a bigger cache/mmap window"""
+    cursor = dbapi_connection.cursor()
+    for pragma in (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA mmap_size=268435456',
+        'PRAGMA cache_size=-65536',
+        'PRAGMA foreign_keys=ON',
+    ):
+        cursor.execute(pragma)
+    cursor.close()
+
+def init_search_index():
+    """Create FTS5 mirrors of wine.name and store.name for fast autocomplete"""
+    for table in ('wine', 'store'):
+        fts = f"{table}_fts"
+        statements = [
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                name, content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')""",
+            f"""CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name);
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF name ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO {fts}(rowid, name) VALUES (new.id, new.name);
+            END""",
+        ]
+        for statement in statements:
+            db.session.execute(text(statement))
+
+    # Compound search index over the fields a "find all Napa cabs" style
+    # query touches; bm25 weights at query time rank name matches highest
+    search_statements = [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS wine_search USING fts5(
+            name, region, country, grape_varietal,
+            content='wine', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5')""",
+        """CREATE TRIGGER IF NOT EXISTS wine_search_insert AFTER INSERT ON wine BEGIN
+            INSERT INTO wine_search(rowid, name, region, country, grape_varietal)
+            VALUES (new.id, new.name, new.region, new.country, new.grape_varietal);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS wine_search_delete AFTER DELETE ON wine BEGIN
+            INSERT INTO wine_search(wine_search, rowid, name, region, country, grape_varietal)
+            VALUES ('delete', old.id, old.name, old.region, old.country, old.grape_varietal);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS wine_search_update
+           AFTER UPDATE OF name, region, country, grape_varietal ON wine BEGIN
+            INSERT INTO wine_search(wine_search, rowid, name, region, country, grape_varietal)
+            VALUES ('delete', old.id, old.name, old.region, old.country, old.grape_varietal);
+            INSERT INTO wine_search(rowid, name, region, country, grape_varietal)
+            VALUES (new.id, new.name, new.region, new.country, new.grape_varietal);
+        END""",
+    ]
+    for statement in search_statements:
+        db.session.execute(text(statement))
+
+    # Rebuild from the content tables so pre-existing rows are indexed
+    db.session.execute(text("INSERT INTO wine_fts(wine_fts) VALUES ('rebuild')"))
+    db.session.execute(text("INSERT INTO store_fts(store_fts) VALUES ('rebuild')"))
+    db.session.execute(text("INSERT INTO wine_search(wine_search) VALUES ('rebuild')"))
+    db.session.commit()
+
+def _fts_prefix_query(query):
+    """Turn user input into an FTS5 prefix match expression.
+
+    Returns '' when the input holds no tokens (e.g. only quotes or
+    whitespace); callers must skip the MATCH in that case, since an
+    empty expression is an FTS5 syntax error."""
+    tokens = query.replace('"', ' ').split()
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+# Cache-aside store for the autocomplete endpoints, keyed on the
+# normalized query with a short TTL so repeat keystrokes skip the DB.
+# Keys are arbitrary user keystrokes, so the dict is capped: _cache_set
+# sweeps expired entries at the cap and then evicts oldest-first
+SUGGESTION_CACHE_TTL = 60  # seconds
+SUGGESTION_CACHE_MAX = 1000  # entries
+_suggestion_cache = {}
+
+def _cache_get(key):
+    """Return a cached suggestion list, or None if missing/expired"""
+    entry = _suggestion_cache.get(key)
+    if entry and entry[1] > time.time():
+        return entry[0]
+    _suggestion_cache.pop(key, None)
+    return None
+
+def _cache_set(key, value, ttl=SUGGESTION_CACHE_TTL):
+    if len(_suggestion_cache) >= SUGGESTION_CACHE_MAX:
+        now = time.time()
+        expired = [k for k, (_, exp) in _suggestion_cache.items() if exp <= now]
+        for k in expired:
+            _suggestion_cache.pop(k, None)
+        # Still full of live entries: drop the oldest-inserted ones
+        while len(_suggestion_cache) >= SUGGESTION_CACHE_MAX:
+            _suggestion_cache.pop(next(iter(_suggestion_cache)))
+    _suggestion_cache[key] = (value, time.time() + ttl)
+
+def _cache_invalidate(prefix):
+    """Drop all cached entries for a given prefix (called after writes)"""
+    for key in [k for k in _suggestion_cache if k.startswith(prefix)]:
+        _suggestion_cache.pop(key, None)
+
+# Read endpoints that benefit from browser-side revalidation
+CACHED_ENDPOINTS = {'collection', 'wine_suggestions', 'store_suggestions'}
+
+@app.after_request
+def add_cache_headers(response):
+    """Attach ETag/Cache-Control to read endpoints so unchanged repeat
+    views are answered with a header-only 304"""
+    if (request.method == 'GET'
+            and request.endpoint in CACHED_ENDPOINTS
+            and response.status_code == 200):
+        response.add_etag()
+        response.cache_control.private = True
+        response.cache_control.max_age = 30
+        return response.make_conditional(request)
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -27,70 +171,78 @@ def wine_suggestions():
     query = request.args.get('q', '').strip()
     if len(query) < 2:
         return jsonify([])
-    
-    # Get existing wine names that match the query
-    wines = Wine.query.filter(Wine.name.ilike(f'%{query}%')).distinct(Wine.name).limit(10).all()
-    suggestions = [wine.name for wine in wines]
-    
+    match_expr = _fts_prefix_query(query)
+    if not match_expr:
+        return jsonify([])
+
+    cache_key = f"wsug:{query.lower()}"
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
+    # Prefix match against the FTS5 index instead of a full-table LIKE scan
+    rows = db.session.execute(
+        text("SELECT DISTINCT name FROM wine_fts WHERE wine_fts MATCH :q LIMIT 10"),
+        {'q': match_expr}
+    )
+    suggestions = [row[0] for row in rows]
+
+    _cache_set(cache_key, suggestions)
     return jsonify(suggestions)
 
 @app.route('/api/store_suggestions')
 def store_suggestions():
     query = request.args.get('q', '').strip()
+
+    cache_key = f"ssug:{query.lower()}"
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
+    match_expr = _fts_prefix_query(query)
     if len(query) < 1:
-        stores = Store.query.all()
-        return jsonify([store.name for store in stores])
-    
-    stores = Store.query.filter(Store.name.ilike(f'%{query}%')).limit(10).all()
-    suggestions = [store.name for store in stores]
-    
+        # Only the name is needed, so select it as a bare column instead
+        # of hydrating Store objects
+        suggestions = [row[0] for row in db.session.query(Store.name)]
+    elif not match_expr:
+        suggestions = []
+    else:
+        rows = db.session.execute(
+            text("SELECT DISTINCT name FROM store_fts WHERE store_fts MATCH :q LIMIT 10"),
+            {'q': match_expr}
+        )
+        suggestions = [row[0] for row in rows]
+
+    _cache_set(cache_key, suggestions)
     return jsonify(suggestions)
 
-@app.route('/submit_wine', methods=['POST'])
-def submit_wine():
-    try:
-        # Get form data
-        wine_name = request.form.get('wine_name')
-        vintage = int(request.form.get('vintage'))
-        price = float(request.form.get('price'))
-        store_name = request.form.get('store_name')
-        cellar_name = request.form.get('cellar_name')
-        rack_number = request.form.get('rack_number')
-        
-        # Get or create store
-        store = Store.query.filter_by(name=store_name).first()
-        if not store:
-            store = Store(name=store_name)
-            db.session.add(store)
-            db.session.commit()
-        
-        # Create wine entry
-        wine = Wine(
-            name=wine_name,
-            vintage=vintage,
-            price=price,
-            store_id=store.id,
-            cellar_name=cellar_name,
-            rack_number=rack_number
-        )
-        
-        db.session.add(wine)
-        db.session.commit()
-        
-        # Scrape wine data in background
+def compute_ratings_summary(ratings):
+    """Average a list of rating dicts on a normalized 100-point scale"""
+    if not ratings:
+        return None
+    total = sum(r['rating'] / r['max_rating'] for r in ratings)
+    return round(total / len(ratings) * 100, 1)
+
+def enrich_wine(wine_id, wine_name, vintage):
+    """Scrape wine data and update the wine row (runs in a background thread)"""
+    with app.app_context():
+        wine = db.session.get(Wine, wine_id)
+        if not wine:
+            return
+
         try:
             wine_data = scraper.search_wine_data(wine_name, vintage)
-            
+
             # If no data found, use mock data for demonstration
             if not any(wine_data.values()):
                 wine_data = scraper.get_mock_wine_data(wine_name, vintage)
-            
+
             # Update wine with scraped data
             wine.color = wine_data.get('color')
             wine.country = wine_data.get('country')
             wine.region = wine_data.get('region')
             wine.grape_varietal = wine_data.get('grape_varietal')
-            
+
             # Get enhanced drinking window data
             window_data = drinking_window_service.get_drinking_window(
                 wine_name=wine_name,
@@ -100,46 +252,120 @@ def submit_wine():
                 region=wine_data.get('region'),
                 color=wine_data.get('color')
             )
-            
+
             # Update wine with enhanced drinking window info
-            wine.drinking_window = window_data.get('drinking_window')
-            wine.drinking_window_confidence = window_data.get('confidence')
-            wine.drinking_window_source = window_data.get('source')
-            wine.peak_drinking_year = window_data.get('peak_year')
-            wine.window_notes = window_data.get('notes')
-            
-            # Add ratings
+            wine.drinking_window = window_data.drinking_window
+            wine.drinking_window_confidence = window_data.confidence
+            wine.drinking_window_source = window_data.source
+            wine.peak_drinking_year = window_data.peak_year
+            wine.window_notes = window_data.notes
+
+            # Add ratings in one batch
             ratings = wine_data.get('ratings', [])
-            total_rating = 0
-            count = 0
-            
-            for rating_data in ratings:
-                rating = WineRating(
+            db.session.add_all([
+                WineRating(
                     wine_id=wine.id,
                     source=rating_data['source'],
                     rating=rating_data['rating'],
                     max_rating=rating_data['max_rating']
                 )
-                db.session.add(rating)
-                
-                # Normalize rating to 100 scale for average
-                normalized_rating = (rating_data['rating'] / rating_data['max_rating']) * 100
-                total_rating += normalized_rating
-                count += 1
-            
-            if count > 0:
-                wine.ratings_summary = round(total_rating / count, 1)
-            
+                for rating_data in ratings
+            ])
+
+            summary = compute_ratings_summary(ratings)
+            if summary is not None:
+                wine.ratings_summary = summary
+
             db.session.commit()
-            
+
         except Exception as e:
             print(f"Error scraping wine data: {e}")
+
+@app.route('/submit_wine', methods=['POST'])
+def submit_wine():
+    try:
+        # Get form data
+        wine_name = request.form.get('wine_name')
+        vintage = int(request.form.get('vintage'))
+        price = float(request.form.get('price'))
+        store_name = request.form.get('store_name')
+        cellar_name = request.form.get('cellar_name')
+        rack_number = request.form.get('rack_number')
         
+        # Get or create store; flush (not commit) so store.id is assigned
+        # and the wine lands in the same transaction
+        store = Store.query.filter_by(name=store_name).first()
+        if not store:
+            store = Store(name=store_name)
+            db.session.add(store)
+            db.session.flush()
+
+        # Create wine entry
+        wine = Wine(
+            name=wine_name,
+            vintage=vintage,
+            price=price,
+            store_id=store.id,
+            cellar_name=cellar_name,
+            rack_number=rack_number
+        )
+        
+        db.session.add(wine)
+        db.session.commit()
+
+        # New wine/store names can change the suggestion results and
+        # the precomputed filter dropdowns
+        _cache_invalidate('wsug:')
+        _cache_invalidate('ssug:')
+        _cache_invalidate('filters:')
+
+        # Enrich the wine in a background thread so the redirect isn't
+        # blocked on outbound scraping
+        thread = threading.Thread(target=enrich_wine, args=(wine.id, wine_name, vintage), daemon=True)
+        thread.start()
+
         return redirect(url_for('collection'))
         
     except Exception as e:
         return f"Error adding wine: {e}", 400
 
+# Filter-dropdown values change only on writes, so cache them longer
+# than the per-keystroke suggestions
+FILTER_CACHE_TTL = 600
+
+def get_filter_options():
+    """Cellar and store lists for the /collection filter dropdowns"""
+    cellars = _cache_get('filters:cellars')
+    if cellars is None:
+        rows = db.session.query(Wine.cellar_name).distinct().all()
+        cellars = [c[0] for c in rows if c[0]]
+        _cache_set('filters:cellars', cellars, ttl=FILTER_CACHE_TTL)
+
+    # Cache plain names rather than ORM instances so entries stay valid
+    # after their originating session is gone
+    stores = _cache_get('filters:stores')
+    if stores is None:
+        stores = [row[0] for row in db.session.query(Store.name).order_by(Store.name)]
+        _cache_set('filters:stores', stores, ttl=FILTER_CACHE_TTL)
+
+    return cellars, stores
+
+# Keyset pagination page size for /collection
+COLLECTION_PAGE_SIZE = 50
+
+# Sort key expressions for keyset pagination: (column, descending)
+# ratings_summary is nullable, so treat missing ratings as 0 for a stable order
+# Sort column, direction, and the Python type of the cursor value. The
+# cursor arrives as text from the query string, and expressions like
+# coalesce() carry no column affinity in SQLite, so the parameter must
+# be cast before binding or every row compares less-than the cursor
+_SORT_KEYS = {
+    'name': (Wine.name, False, str),
+    'vintage': (Wine.vintage, True, int),
+    'price': (Wine.price, True, float),
+    'rating': (func.coalesce(Wine.ratings_summary, 0), True, float),
+}
+
 @app.route('/collection')
 def collection():
     # Get filter and sort parameters
@@ -147,48 +373,95 @@ def collection():
     filter_color = request.args.get('color', '')
     filter_cellar = request.args.get('cellar', '')
     filter_store = request.args.get('store', '')
+    search_text = request.args.get('q', '').strip()
+    after_val = request.args.get('after_val')
+    after_id = request.args.get('after_id', type=int)
     
-    # Build query
-    query = Wine.query
-    
+    # Build query, eager-loading relations the template reads per row so
+    # rendering doesn't trigger one query per wine (N+1)
+    query = Wine.query.options(selectinload(Wine.ratings))
+
+    # Free-text search across name/region/country/varietal via the
+    # compound FTS index, ranked so name matches come first. Input that
+    # tokenizes to nothing (just quotes/whitespace) skips the filter
+    match_expr = _fts_prefix_query(search_text) if search_text else ''
+    if match_expr:
+        rows = db.session.execute(
+            text("""SELECT rowid FROM wine_search WHERE wine_search MATCH :q
+                    ORDER BY bm25(wine_search, 10.0, 5.0, 2.0, 5.0) LIMIT 500"""),
+            {'q': match_expr}
+        )
+        matched_ids = [row[0] for row in rows]
+        query = query.filter(Wine.id.in_(matched_ids))
+
     # Apply filters
     if filter_color:
         query = query.filter(Wine.color == filter_color)
     if filter_cellar:
-        query = query.filter(Wine.cellar_name.ilike(f'%{filter_cellar}%'))
+        # Dropdown sends the exact cellar name, so match by equality and
+        # let SQLite use the cellar_name index instead of a LIKE scan
+        query = query.filter(Wine.cellar_name == filter_cellar)
     if filter_store:
-        query = query.join(Store).filter(Store.name.ilike(f'%{filter_store}%'))
-    
-    # Apply sorting
-    if sort_by == 'name':
-        query = query.order_by(Wine.name)
-    elif sort_by == 'vintage':
-        query = query.order_by(Wine.vintage.desc())
-    elif sort_by == 'price':
-        query = query.order_by(Wine.price.desc())
-    elif sort_by == 'rating':
-        query = query.order_by(Wine.ratings_summary.desc())
-    
-    wines = query.all()
-    
-    # Get unique values for filter dropdowns
-    cellars = db.session.query(Wine.cellar_name).distinct().all()
-    cellars = [c[0] for c in cellars if c[0]]
+        # Reuse the filter join to populate wine.store instead of joining twice
+        query = query.join(Store).filter(Store.name == filter_store)
+        query = query.options(contains_eager(Wine.store))
+    else:
+        query = query.options(joinedload(Wine.store))
     
-    stores = Store.query.all()
+    # Apply sorting with the wine id as tiebreaker so the keyset cursor
+    # is unambiguous
+    sort_col, descending, cursor_type = _SORT_KEYS.get(sort_by, _SORT_KEYS['name'])
+    if descending:
+        query = query.order_by(sort_col.desc(), Wine.id.desc())
+    else:
+        query = query.order_by(sort_col, Wine.id)
+
+    # Keyset pagination: seek past the cursor instead of OFFSET-scanning.
+    # A malformed cursor value just serves the first page again
+    if after_val is not None and after_id is not None:
+        try:
+            cursor_val = cursor_type(after_val)
+        except ValueError:
+            cursor_val = None
+        if cursor_val is not None:
+            if descending:
+                query = query.filter(tuple_(sort_col, Wine.id) < (cursor_val, after_id))
+            else:
+                query = query.filter(tuple_(sort_col, Wine.id) > (cursor_val, after_id))
+
+    wines = query.limit(COLLECTION_PAGE_SIZE).all()
+
+    # Build the cursor for the next page (only if this page is full)
+    next_cursor = None
+    if len(wines) == COLLECTION_PAGE_SIZE:
+        last = wines[-1]
+        last_values = {
+            'name': last.name,
+            'vintage': last.vintage,
+            'price': last.price,
+            'rating': last.ratings_summary or 0,
+        }
+        next_cursor = {'after_val': last_values.get(sort_by, last.name), 'after_id': last.id}
     
-    return render_template('collection.html', 
-                         wines=wines, 
+    # Get values for the filter dropdowns (cached between writes)
+    cellars, stores = get_filter_options()
+
+
+    return render_template('collection.html',
+                         wines=wines,
                          cellars=cellars,
                          stores=stores,
                          current_sort=sort_by,
+                         next_cursor=next_cursor,
                          current_filters={
                              'color': filter_color,
                              'cellar': filter_cellar,
-                             'store': filter_store
+                             'store': filter_store,
+                             'q': search_text
                          })
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        init_search_index()
     app.run(debug=True)
\ No newline at end of file
@@ -3,6 +3,8 @@
 Demo data script to populate the wine cellar database with sample entries
 """
 
+from sqlalchemy import text
+
 from app import app, db
 from models import Wine, Store, WineRating
 
@@ -12,6 +14,13 @@ def create_demo_data():
         # Clear existing data
         db.drop_all()
         db.create_all()
+
+        # Drop the wine indexes for the duration of the bulk load so
+        # inserts don't maintain B-trees row by row; they are rebuilt in
+        # one pass afterwards
+        wine_indexes = list(Wine.__table__.indexes)
+        for index in wine_indexes:
+            index.drop(db.engine)
         
         # Create sample stores
         stores_data = [
@@ -22,12 +31,9 @@ def create_demo_data():
             "BevMo!"
         ]
         
-        stores = []
-        for store_name in stores_data:
-            store = Store(name=store_name)
-            db.session.add(store)
-            stores.append(store)
-        
+        # Bulk-save with return_defaults so the generated ids are usable below
+        stores = [Store(name=store_name) for store_name in stores_data]
+        db.session.bulk_save_objects(stores, return_defaults=True)
         db.session.commit()
         
         # Create sample wines - only user-entered data, let the app scrape the rest
@@ -74,8 +80,8 @@ def create_demo_data():
             }
         ]
         
-        for wine_data in wines_data:
-            wine = Wine(
+        wines = [
+            Wine(
                 name=wine_data['name'],
                 vintage=wine_data['vintage'],
                 price=wine_data['price'],
@@ -83,8 +89,15 @@ def create_demo_data():
                 cellar_name=wine_data['cellar_name'],
                 rack_number=wine_data['rack_number']
             )
-            db.session.add(wine)
-        
+            for wine_data in wines_data
+        ]
+        db.session.bulk_save_objects(wines)
+        db.session.commit()
+
+        # Rebuild the indexes over the loaded data and refresh planner stats
+        for index in wine_indexes:
+            index.create(db.engine)
+        db.session.execute(text('ANALYZE'))
         db.session.commit()
         
         print("✅ Demo data created successfully!")
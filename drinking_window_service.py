@@ -5,821 +5,692 @@ Implements multi-source lookup for accurate wine drinking windows
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
 import re
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import time
 import urllib.parse
+import functools
 import json
+import random
+import sqlite3
+import threading
 from datetime import datetime
 
+# Year-range fragment shared by most drinking-window patterns
+_RANGE = r'(\d{4})\s*[-–]\s*(\d{4})'
+
+# Pre-compiled (pattern, kind) tuples per source. Kinds tell the scraper
+# how to interpret the groups:
+#   'range'      - (start, end) years
+#   'start_year' - single year the window opens
+#   'end_year'   - single year the window closes (e.g. "cellar until")
+#   'years'      - critic's cellaring horizon in years from the vintage
+#   'cellaring'  - retailer's cellaring potential in years from the vintage
+_CELLARTRACKER_PATTERNS = (
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'drinking window[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'mature[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'best[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'cellar until[:\s]+(\d{4})'), 'start_year'),
+    (re.compile(r'drink from[:\s]+(\d{4})'), 'start_year'),
+    (re.compile(r'ready[:\s]+' + _RANGE), 'range'),
+)
+
+_WINE_SEARCHER_PATTERNS = (
+    (re.compile(r'drinking window[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'best consumed[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'ready to drink[:\s]+' + _RANGE), 'range'),
+)
+
+_PARKER_PATTERNS = (
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'anticipated maturity[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'cellar for[:\s]+(\d+)\s*years'), 'years'),
+    (re.compile(r'ready in[:\s]+(\d+)\s*years'), 'years'),
+    (re.compile(r'best[:\s]+' + _RANGE), 'range'),
+)
+
+_VINOUS_PATTERNS = (
+    (re.compile(r'drinking window[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'best from[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'cellar[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'ready[:\s]+' + _RANGE), 'range'),
+)
+
+_JANCIS_PATTERNS = (
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'drinking window[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'best[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'mature[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'cellar until[:\s]+(\d{4})'), 'end_year'),
+)
+
+_VIVINO_PATTERNS = (
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'best[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'drinking window[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'ready[:\s]+' + _RANGE), 'range'),
+)
+
+_WINE_COM_PATTERNS = (
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'drinking window[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'best consumed[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'cellaring potential[:\s]+(\d+)\s*years'), 'cellaring'),
+)
+
+_DECANTER_PATTERNS = (
+    (re.compile(r'drink[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'drinking window[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'best[:\s]+' + _RANGE), 'range'),
+    (re.compile(r'ready[:\s]+' + _RANGE), 'range'),
+)
+
+_SPECTATOR_PATTERNS = _DECANTER_PATTERNS
+
+def _fuse(tagged_patterns):
+    """Fuse tagged patterns into one alternation plus a group->kind map,
+    so a page is scanned once instead of once per pattern"""
+    parts = []
+    kinds = {}
+    for i, (pattern, kind) in enumerate(tagged_patterns):
+        name = f'p{i}'
+        parts.append(f'(?P<{name}>{pattern.pattern})')
+        kinds[name] = kind
+    # IGNORECASE so the page can be scanned as-is, without allocating a
+    # lowercased copy of the whole text first
+    return re.compile('|'.join(parts), re.IGNORECASE), kinds
+
+_NUM_RE = re.compile(r'\d+')
+
+# Persistent cache location and TTLs: scraped windows change rarely, so
+# keep them for a month; rule-based fallbacks are retried daily in case
+# the sources come back
+CACHE_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'instance', 'drinking_window_cache.db')
+CACHE_TTL_SCRAPED = 30 * 24 * 3600
+CACHE_TTL_FALLBACK = 24 * 3600
+
+# The drinking-window patterns only match plain text like "drink: 2025-2030",
+# so stripping tags with a regex is enough -- no need to build a full DOM
+# just to call get_text() on it
+_TAG_STRIP_RE = re.compile(r'<[^>]+>')
+
+# Per-host rate limits as (bucket capacity, refill tokens/sec).
+# DuckDuckGo fronts the sources without a usable public search page,
+# so it gets a stricter budget; everything else uses the default
+_BUCKET_DEFAULT = (5, 1.0)
+_BUCKET_LIMITS = {
+    'html.duckduckgo.com': (3, 0.5),
+}
+
+# Backoff / circuit-breaker tuning: halve a host's refill rate on each
+# 429/5xx (recovering by _RATE_STEP per success), and stop calling a
+# host for _BREAKER_COOLDOWN seconds after a failure streak
+_MAX_ATTEMPTS = 3
+_BACKOFF_CAP = 30.0
+_BODY_CAP = 256 * 1024
+_RATE_STEP = 0.1
+_RATE_FLOOR = 0.1
+_BREAKER_THRESHOLD = 3
+_BREAKER_WINDOW = 60.0
+_BREAKER_COOLDOWN = 300.0
+
+# Concurrent scrapes per lookup. Deliberately smaller than the source
+# count: the merge loop takes the first hit in priority order, and only
+# futures still queued can be cancelled, so a small pool lets a
+# high-priority hit stop most lower-priority requests from ever firing
+_SCRAPE_CONCURRENCY = 3
+
+class CircuitOpenError(Exception):
+    """Raised when a host's circuit breaker is open"""
+
+class Window(NamedTuple):
+    """A resolved drinking window. Slotted and immutable, so the
+    thousands of results held in the caches stay compact"""
+    drinking_window: str
+    confidence: str
+    source: str
+    notes: str
+    peak_year: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        """Dict form for JSON serialization and template use"""
+        return self._asdict()
+
+def _match_years(match) -> List[int]:
+    """Pull the numeric groups out of a fused-alternation match"""
+    return [int(n) for n in _NUM_RE.findall(match.group())]
+
+# Every drinking-window pattern starts with one of these literal words,
+# so str.find (memchr-backed C code) can locate the only offsets where
+# a match could begin. str.find is case-sensitive, so each anchor is
+# searched in the casings that occur on real pages (lowercase,
+# Capitalized, ALL-CAPS) rather than lowercasing the whole page
+_ANCHORS = ('drink', 'best', 'cellar', 'ready', 'mature', 'anticipated')
+_ANCHOR_VARIANTS = tuple(
+    dict.fromkeys(v for a in _ANCHORS for v in (a, a.capitalize(), a.upper()))
+)
+
+def _scan(text: str, combined):
+    """Yield fused-pattern matches, anchored on literal keyword hits.
+
+    Scanning the page with str.find for the anchor words and running the
+    regex only at those offsets keeps the regex cost proportional to the
+    number of keyword hits instead of the page size."""
+    starts = set()
+    for anchor in _ANCHOR_VARIANTS:
+        pos = text.find(anchor)
+        while pos != -1:
+            starts.add(pos)
+            pos = text.find(anchor, pos + 1)
+    for pos in sorted(starts):
+        match = combined.match(text, pos)
+        if match:
+            yield match
+
+_CT_COMBINED, _CT_KINDS = _fuse(_CELLARTRACKER_PATTERNS)
+_WS_COMBINED, _WS_KINDS = _fuse(_WINE_SEARCHER_PATTERNS)
+_PARKER_COMBINED, _PARKER_KINDS = _fuse(_PARKER_PATTERNS)
+_VINOUS_COMBINED, _VINOUS_KINDS = _fuse(_VINOUS_PATTERNS)
+_JANCIS_COMBINED, _JANCIS_KINDS = _fuse(_JANCIS_PATTERNS)
+_VIVINO_COMBINED, _VIVINO_KINDS = _fuse(_VIVINO_PATTERNS)
+_WINE_COM_COMBINED, _WINE_COM_KINDS = _fuse(_WINE_COM_PATTERNS)
+_DECANTER_COMBINED, _DECANTER_KINDS = _fuse(_DECANTER_PATTERNS)
+_SPECTATOR_COMBINED, _SPECTATOR_KINDS = _fuse(_SPECTATOR_PATTERNS)
+
+# How each match kind turns into a (start, end) window
+_KIND_WINDOWS = {
+    'range': lambda years, vintage: (years[0], years[1]),
+    'start_year': lambda years, vintage: (years[0], years[0] + 8),
+    'end_year': lambda years, vintage: (max(vintage + 1, years[0] - 10), years[0]),
+    'years': lambda years, vintage: (vintage + max(1, years[0] - 2), vintage + years[0] + 8),
+    'cellaring': lambda years, vintage: (vintage + 2, vintage + years[0]),
+}
+
+class SourceConfig(NamedTuple):
+    """Everything the generic scrape pipeline needs for one source"""
+    name: str
+    display: str
+    query_template: str          # '{wine}'/'{vintage}' placeholders
+    url_template: str            # '{query}' placeholder, already quoted
+    combined: 're.Pattern'
+    kinds: Dict[str, str]
+    confidence: str
+    notes: str
+    # Per-kind (confidence, notes) overrides for derived windows
+    kind_results: Dict[str, Tuple[str, str]] = {}
+
+# Static-HTML search endpoint for sources whose own search needs a
+# login or JavaScript; unlike Google's JS-wrapped results it returns
+# plain markup and does not CAPTCHA after a handful of requests
+_DDG_URL = 'https://html.duckduckgo.com/html/?q={query}'
+
+# Source priority order - high accuracy specific sources first
+SOURCES = (
+    SourceConfig('cellartracker', 'CellarTracker', '{wine} {vintage}',
+                 'https://www.cellartracker.com/list.asp?Table=List&iUserOverride=0&szSearch={query}',
+                 _CT_COMBINED, _CT_KINDS, 'high', 'Crowd-sourced collector data',
+                 {'start_year': ('medium', 'Estimated range from single year')}),
+    SourceConfig('wine_searcher', 'Wine-Searcher', '{wine} {vintage}',
+                 'https://www.wine-searcher.com/find/{query}',
+                 _WS_COMBINED, _WS_KINDS, 'high', 'Professional aggregated data'),
+    SourceConfig('erobertparker', 'Robert Parker Wine Advocate',
+                 '"{wine}" {vintage} site:erobertparker.com', _DDG_URL,
+                 _PARKER_COMBINED, _PARKER_KINDS, 'high', 'Professional critic assessment'),
+    SourceConfig('vinous', 'Vinous', '{wine} {vintage}',
+                 'https://vinous.com/search?q={query}',
+                 _VINOUS_COMBINED, _VINOUS_KINDS, 'high', 'Professional wine critic review'),
+    SourceConfig('jancisrobinson', 'Jancis Robinson',
+                 '"{wine}" {vintage} site:jancisrobinson.com', _DDG_URL,
+                 _JANCIS_COMBINED, _JANCIS_KINDS, 'high', 'Master of Wine assessment',
+                 {'end_year': ('medium', 'Estimated from cellar until date')}),
+    SourceConfig('vivino', 'Vivino', '{wine} {vintage}',
+                 'https://www.vivino.com/search/wines?q={query}',
+                 _VIVINO_COMBINED, _VIVINO_KINDS, 'medium', 'User community data'),
+    SourceConfig('wine_com', 'Wine.com', '{wine} {vintage}',
+                 'https://www.wine.com/search/{query}',
+                 _WINE_COM_COMBINED, _WINE_COM_KINDS, 'medium', 'Commercial wine data',
+                 {'cellaring': ('medium', 'Producer-provided cellaring info')}),
+    SourceConfig('decanter', 'Decanter', '{wine} {vintage}',
+                 'https://www.decanter.com/?s={query}',
+                 _DECANTER_COMBINED, _DECANTER_KINDS, 'medium', 'Wine magazine professional review'),
+    SourceConfig('wine_spectator', 'Wine Spectator',
+                 '"{wine}" {vintage} site:winespectator.com', _DDG_URL,
+                 _SPECTATOR_COMBINED, _SPECTATOR_KINDS, 'medium', 'Professional wine magazine rating'),
+)
+
+_SOURCE_MAP = {config.name: config for config in SOURCES}
+
+# Fallback rules, evaluated in order; first match wins. Each rule is
+# (condition groups, window start/end offsets from vintage, confidence,
+# notes). Groups are AND'd together and the atoms inside a group are
+# OR'd, where an atom is (field, op, value) with op one of 'in'
+# (substring), 'prefix' or 'eq'.
+class FallbackRule(NamedTuple):
+    conditions: tuple
+    start: int
+    end: int
+    confidence: str
+    notes: str
+
+# Shared guard: Spanish wines by country or marquee producer names
+_SPANISH = (('country', 'eq', 'spain'), ('name', 'in', 'vega sicilia'),
+            ('name', 'in', 'pesquera'), ('name', 'in', 'aalto'),
+            ('name', 'in', 'pingus'))
+_BORDEAUX = (('name', 'prefix', 'chateau'), ('name', 'prefix', 'château'),
+             ('region', 'in', 'bordeaux'))
+_RIOJA = (('name', 'in', 'rioja'), ('region', 'in', 'rioja'))
+
+_FALLBACK_RULES = (
+    # Bordeaux First Growths - exceptional longevity
+    FallbackRule(((('name', 'in', 'lafite'), ('name', 'in', 'latour'),
+                   ('name', 'in', 'margaux'), ('name', 'in', 'mouton'),
+                   ('name', 'in', 'haut-brion')),),
+                 8, 40, 'medium', 'Bordeaux First Growth estimate'),
+    # Bordeaux Chateaux general
+    FallbackRule((_BORDEAUX, (('name', 'in', 'saint-emilion'),
+                              ('name', 'in', 'pomerol'))),
+                 3, 20, 'medium', 'Right Bank Bordeaux estimate'),
+    FallbackRule((_BORDEAUX,), 5, 25, 'medium', 'Left Bank Bordeaux estimate'),
+    # Burgundy
+    FallbackRule(((('name', 'in', 'domaine'),),
+                  (('region', 'in', 'burgundy'), ('name', 'in', 'bourgogne')),
+                  (('color', 'eq', 'Red'),)),
+                 3, 15, 'medium', 'Burgundy red wine estimate'),
+    FallbackRule(((('name', 'in', 'domaine'),),
+                  (('region', 'in', 'burgundy'), ('name', 'in', 'bourgogne'))),
+                 1, 8, 'medium', 'Burgundy white wine estimate'),
+    # Champagne
+    FallbackRule(((('region', 'in', 'champagne'), ('name', 'in', 'champagne')),),
+                 3, 15, 'medium', 'Champagne estimate'),
+    # Italian wines
+    FallbackRule(((('country', 'eq', 'italy'),),
+                  (('name', 'in', 'barolo'), ('name', 'in', 'barbaresco'))),
+                 5, 25, 'medium', 'Nebbiolo-based wine estimate'),
+    FallbackRule(((('country', 'eq', 'italy'),), (('name', 'in', 'brunello'),)),
+                 4, 20, 'medium', 'Brunello di Montalcino estimate'),
+    FallbackRule(((('country', 'eq', 'italy'),),
+                  (('name', 'in', 'chianti classico'),)),
+                 2, 12, 'medium', 'Chianti Classico estimate'),
+    # Spanish wines
+    FallbackRule((_SPANISH, (('name', 'in', 'vega sicilia unico'),)),
+                 6, 30, 'medium', 'Vega Sicilia Unico - premium Spanish wine'),
+    FallbackRule((_SPANISH, _RIOJA, (('name', 'in', 'gran reserva'),)),
+                 4, 20, 'medium', 'Rioja Gran Reserva estimate'),
+    FallbackRule((_SPANISH, _RIOJA, (('name', 'in', 'reserva'),)),
+                 3, 15, 'medium', 'Rioja Reserva estimate'),
+    FallbackRule((_SPANISH, _RIOJA), 2, 10, 'medium', 'Rioja wine estimate'),
+    FallbackRule((_SPANISH, (('name', 'in', 'ribera del duero'),
+                             ('region', 'in', 'ribera del duero'))),
+                 4, 18, 'medium', 'Ribera del Duero estimate'),
+    FallbackRule((_SPANISH, (('name', 'in', 'pingus'),
+                             ('name', 'in', 'dominio de pingus'),
+                             ('name', 'in', 'aalto'),
+                             ('name', 'in', 'pesquera'))),
+                 5, 25, 'medium', 'Premium Spanish wine estimate'),
+    FallbackRule((_SPANISH,), 2, 12, 'medium', 'Spanish red wine estimate'),
+    # Grape varietal-based rules
+    FallbackRule(((('grape', 'in', 'cabernet sauvignon'),),
+                  (('country', 'eq', 'usa'),)),
+                 3, 15, 'low', 'US Cabernet Sauvignon estimate'),
+    FallbackRule(((('grape', 'in', 'cabernet sauvignon'),),),
+                 4, 18, 'low', 'Cabernet Sauvignon general estimate'),
+    FallbackRule(((('grape', 'in', 'pinot noir'),),),
+                 2, 10, 'low', 'Pinot Noir estimate'),
+    FallbackRule(((('grape', 'in', 'merlot'),),), 2, 12, 'low', 'Merlot estimate'),
+    FallbackRule(((('grape', 'in', 'syrah'), ('grape', 'in', 'shiraz')),),
+                 3, 15, 'low', 'Syrah/Shiraz estimate'),
+    FallbackRule(((('grape', 'in', 'chardonnay'),), (('name', 'in', 'chablis'),)),
+                 1, 8, 'low', 'Chablis Chardonnay estimate'),
+    FallbackRule(((('grape', 'in', 'chardonnay'),),),
+                 1, 6, 'low', 'Chardonnay general estimate'),
+    FallbackRule(((('grape', 'in', 'sauvignon blanc'),),),
+                 0, 4, 'low', 'Sauvignon Blanc estimate'),
+    FallbackRule(((('grape', 'in', 'riesling'),),),
+                 1, 12, 'low', 'Riesling estimate'),
+    # Basic color-based fallback
+    FallbackRule(((('color', 'eq', 'Red'),),),
+                 2, 12, 'low', 'Generic red wine estimate'),
+    FallbackRule(((('color', 'eq', 'White'),),),
+                 0, 5, 'low', 'Generic white wine estimate'),
+    # Ultimate fallback
+    FallbackRule((), 1, 8, 'low', 'Generic wine estimate'),
+)
+
+@functools.lru_cache(maxsize=4096)
+def _fallback_rule(name: str, grape: str, region: str, country: str,
+                   color: str) -> FallbackRule:
+    """Pick the first fallback rule matching the (lowercased) fields.
+
+    Pure in its arguments, so lookups memoize: bulk imports hit the
+    same producer/grape/region combinations over and over. The vintage
+    is applied by the caller, keeping the cache key small."""
+    fields = {'name': name, 'grape': grape, 'region': region,
+              'country': country, 'color': color}
+    for rule in _FALLBACK_RULES:
+        if all(_group_matches(group, fields) for group in rule.conditions):
+            return rule
+
+def _group_matches(group, fields) -> bool:
+    """True when any atom in an OR-group holds for the wine's fields"""
+    for field, op, value in group:
+        text = fields[field]
+        if op == 'in':
+            if value in text:
+                return True
+        elif op == 'prefix':
+            if text.startswith(value):
+                return True
+        elif text == value:
+            return True
+    return False
+
 class DrinkingWindowService:
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Connection': 'keep-alive'
         })
+
+        # Keep-alive connection pool sized for the concurrent source
+        # fan-out; several scrapers share duckduckgo.com, so reusing
+        # sockets saves a TCP+TLS handshake per call after the first
+        # Retries here cover connection/read errors only; 429/5xx are
+        # handled in _get so Retry-After and the adaptive buckets apply
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
-        # Source priority order - high accuracy specific sources first
-        self.sources = [
-            'cellartracker',
-            'wine_searcher', 
-            'erobertparker',
-            'vinous',
-            'jancisrobinson',
-            'vivino',
-            'wine_com',
-            'decanter',
-            'wine_spectator'
-        ]
+        # Source priority order comes from the SOURCES table
+        self.sources = [config.name for config in SOURCES]
         
-        # Cache to avoid re-scraping
+        # In-process cache backed by a SQLite file, so lookups survive
+        # restarts instead of re-hitting every upstream site
         self.cache = {}
-        
+
+        # Token buckets keyed by host, so rate-limiting one site never
+        # stalls requests to the others
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._bucket_lock = threading.Lock()
+
+        # Adaptive state per host: current refill rate, recent failure
+        # streak as (count, window start), and breaker-open deadline
+        self._rates: Dict[str, float] = {}
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self._open_until: Dict[str, float] = {}
+
+        os.makedirs(os.path.dirname(CACHE_DB_PATH), exist_ok=True)
+        with sqlite3.connect(CACHE_DB_PATH) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS drinking_window_cache ('
+                'key TEXT PRIMARY KEY, result TEXT NOT NULL, '
+                'expires_at REAL NOT NULL)'
+            )
+
+    def _acquire(self, host: str):
+        """Take a token from the host's bucket, sleeping until one refills"""
+        cap, base_rate = _BUCKET_LIMITS.get(host, _BUCKET_DEFAULT)
+        with self._bucket_lock:
+            rate = self._rates.get(host, base_rate)
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (float(cap), now))
+            tokens = min(cap, tokens + rate * (now - last))
+            wait = 0.0
+            if tokens < 1:
+                wait = (1 - tokens) / rate
+                tokens = 1.0
+            self._buckets[host] = (tokens - 1, now + wait)
+        if wait:
+            time.sleep(wait)
+
+    def _record_success(self, host: str):
+        """Nudge the host's refill rate back up toward its configured base"""
+        _, base_rate = _BUCKET_LIMITS.get(host, _BUCKET_DEFAULT)
+        with self._bucket_lock:
+            self._rates[host] = min(base_rate,
+                                    self._rates.get(host, base_rate) + _RATE_STEP)
+            self._failures.pop(host, None)
+
+    def _record_failure(self, host: str):
+        """Halve the host's refill rate and open the breaker on a streak"""
+        _, base_rate = _BUCKET_LIMITS.get(host, _BUCKET_DEFAULT)
+        with self._bucket_lock:
+            self._rates[host] = max(_RATE_FLOOR,
+                                    self._rates.get(host, base_rate) / 2)
+            now = time.monotonic()
+            streak, first = self._failures.get(host, (0, now))
+            if now - first > _BREAKER_WINDOW:
+                streak, first = 0, now
+            streak += 1
+            self._failures[host] = (streak, first)
+            if streak > _BREAKER_THRESHOLD:
+                self._open_until[host] = now + _BREAKER_COOLDOWN
+
+    def _get(self, url: str, timeout=15):
+        """session.get with per-host politeness, adaptive backoff on
+        429/5xx, and a circuit breaker for hosts that keep failing"""
+        host = urllib.parse.urlsplit(url).hostname
+        with self._bucket_lock:
+            if time.monotonic() < self._open_until.get(host, 0.0):
+                raise CircuitOpenError(f"{host} circuit open, skipping")
+
+        response = None
+        for attempt in range(_MAX_ATTEMPTS):
+            self._acquire(host)
+            response = self.session.get(url, timeout=timeout, stream=True)
+            if response.status_code != 429 and response.status_code < 500:
+                self._record_success(host)
+                # Read at most _BODY_CAP bytes: the window phrase sits in
+                # the first screenful, and result pages can top 500 KB
+                chunks = []
+                total = 0
+                for chunk in response.iter_content(16384):
+                    chunks.append(chunk)
+                    total += len(chunk)
+                    if total >= _BODY_CAP:
+                        break
+                response.close()
+                response._content = b''.join(chunks)
+                return response
+            response.close()
+            self._record_failure(host)
+            if attempt + 1 < _MAX_ATTEMPTS:
+                retry_after = response.headers.get('Retry-After')
+                try:
+                    delay = float(retry_after)
+                except (TypeError, ValueError):
+                    delay = random.uniform(0, 2 ** attempt)
+                time.sleep(min(delay, _BACKOFF_CAP))
+        return response
+
+    def _cache_load(self, cache_key: str) -> Optional[Window]:
+        """Fetch a non-expired result from the persistent cache"""
+        try:
+            with sqlite3.connect(CACHE_DB_PATH) as conn:
+                row = conn.execute(
+                    'SELECT result FROM drinking_window_cache '
+                    'WHERE key = ? AND expires_at > ?',
+                    (cache_key, time.time())
+                ).fetchone()
+            return Window(**json.loads(row[0])) if row else None
+        except (sqlite3.Error, TypeError, ValueError):
+            return None
+
+    def _cache_store(self, cache_key: str, result: Window, ttl: int):
+        """Write a result to the persistent cache with an expiry"""
+        try:
+            with sqlite3.connect(CACHE_DB_PATH) as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO drinking_window_cache '
+                    '(key, result, expires_at) VALUES (?, ?, ?)',
+                    (cache_key, json.dumps(result.to_dict()), time.time() + ttl)
+                )
+        except sqlite3.Error:
+            pass
+
     def get_drinking_window(self, wine_name: str, vintage: int, grape_varietal: str = None, 
-                          country: str = None, region: str = None, color: str = None) -> Dict:
+                          country: str = None, region: str = None, color: str = None) -> Window:
         """
         Get drinking window with confidence score and source attribution
-        Returns: {
-            'drinking_window': 'YYYY-YYYY',
-            'peak_year': YYYY,
-            'confidence': 'high|medium|low', 
-            'source': 'source_name',
-            'notes': 'additional info'
-        }
+        Returns a Window('YYYY-YYYY', 'high|medium|low', source_name,
+        notes, peak_year).
         """
         cache_key = f"{wine_name}_{vintage}".lower().replace(' ', '_')
         
         if cache_key in self.cache:
             return self.cache[cache_key]
-        
-        # Try sources in priority order
-        for source in self.sources:
-            try:
-                result = self._scrape_source(source, wine_name, vintage, grape_varietal, country, region, color)
-                if result and result.get('drinking_window'):
-                    # Add peak year calculation
-                    peak_year = self._calculate_peak_year(result['drinking_window'])
-                    if peak_year:
-                        result['peak_year'] = peak_year
+
+        cached = self._cache_load(cache_key)
+        if cached is not None:
+            self.cache[cache_key] = cached
+            return cached
+
+        # Scrape a few sources at a time and take the first hit in
+        # priority order; see _SCRAPE_CONCURRENCY for why the pool is
+        # smaller than the source list
+        with ThreadPoolExecutor(max_workers=_SCRAPE_CONCURRENCY) as executor:
+            futures = [
+                executor.submit(self._scrape_source, source, wine_name, vintage,
+                                grape_varietal, country, region, color)
+                for source in self.sources
+            ]
+
+            for source, future in zip(self.sources, futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error scraping {source}: {e}")
+                    continue
+                if result and result.drinking_window:
+                    # Drop queued lower-priority scrapes we no longer need
+                    for pending in futures:
+                        pending.cancel()
+                    # Scraped windows carry their peak year already; only
+                    # parse the string if it is somehow missing
+                    if result.peak_year is None:
+                        peak_year = self._calculate_peak_year(result.drinking_window)
+                        if peak_year:
+                            result = result._replace(peak_year=peak_year)
                     self.cache[cache_key] = result
+                    self._cache_store(cache_key, result, CACHE_TTL_SCRAPED)
                     return result
-                
-                # Rate limit between sources
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error scraping {source}: {e}")
-                continue
         
-        # Fallback to rule-based estimation
+        # Fallback to rule-based estimation (peak year included)
         fallback = self._get_fallback_window(wine_name, vintage, grape_varietal, country, region, color)
-        # Add peak year to fallback
-        peak_year = self._calculate_peak_year(fallback['drinking_window'])
-        if peak_year:
-            fallback['peak_year'] = peak_year
         self.cache[cache_key] = fallback
+        self._cache_store(cache_key, fallback, CACHE_TTL_FALLBACK)
         return fallback
+
+    def get_drinking_windows(self, wines: List[Dict]) -> List[Window]:
+        """Look up drinking windows for many wines concurrently.
+
+        Each entry is a kwargs dict for get_drinking_window (wine_name,
+        vintage, and optionally grape_varietal/country/region/color).
+        Up to 10 lookups run at once on threads sharing this service's
+        session, caches and per-host token buckets, so a full-cellar
+        import is bounded by politeness limits rather than serialized
+        network latency. Results come back in input order."""
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = [executor.submit(self.get_drinking_window, **wine)
+                       for wine in wines]
+            return [future.result() for future in futures]
     
     def _scrape_source(self, source: str, wine_name: str, vintage: int, grape_varietal: str, 
-                      country: str, region: str, color: str) -> Optional[Dict]:
-        """Route to specific source scraper"""
-        scrapers = {
-            'cellartracker': self._scrape_cellartracker,
-            'wine_searcher': self._scrape_wine_searcher,
-            'erobertparker': self._scrape_erobertparker,
-            'vinous': self._scrape_vinous,
-            'jancisrobinson': self._scrape_jancisrobinson,
-            'vivino': self._scrape_vivino,
-            'wine_com': self._scrape_wine_com,
-            'decanter': self._scrape_decanter,
-            'wine_spectator': self._scrape_wine_spectator
-        }
-        
-        scraper = scrapers.get(source)
-        if scraper:
-            return scraper(wine_name, vintage, grape_varietal, country, region, color)
+                      country: str, region: str, color: str) -> Optional[Window]:
+        """Route to the generic scrape pipeline for the named source"""
+        config = _SOURCE_MAP.get(source)
+        if config:
+            return self._scrape(config, wine_name, vintage)
         return None
-    
-    def _scrape_cellartracker(self, wine_name: str, vintage: int, grape_varietal: str, 
-                             country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape CellarTracker.com for crowd-sourced drinking windows"""
-        try:
-            # CellarTracker search URL
-            query = f"{wine_name} {vintage}"
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.cellartracker.com/list.asp?Table=List&iUserOverride=0&szSearch={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for drinking window patterns in text
-            text_content = soup.get_text().lower()
-            
-            # CellarTracker specific patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'mature[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar until[:\s]+(\d{4})',
-                r'drink from[:\s]+(\d{4})',
-                r'ready[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if match.lastindex == 2:  # Range
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'high',
-                            'source': 'CellarTracker',
-                            'notes': 'Crowd-sourced collector data'
-                        }
-                    else:  # Single year - create range
-                        start_year = int(match.group(1))
-                        return {
-                            'drinking_window': f"{start_year}-{start_year + 8}",
-                            'confidence': 'medium',
-                            'source': 'CellarTracker',
-                            'notes': 'Estimated range from single year'
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"CellarTracker scraping error: {e}")
-            return None
-    
-    def _scrape_wine_searcher(self, wine_name: str, vintage: int, grape_varietal: str,
-                             country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape Wine-Searcher.com for professional aggregated data"""
-        try:
-            query = f"{wine_name} {vintage}"
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.wine-searcher.com/find/{encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Wine-Searcher specific patterns
-            patterns = [
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best consumed[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar until[:\s]+(\d{4})',
-                r'ready to drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if match.lastindex == 2:
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'high',
-                            'source': 'Wine-Searcher',
-                            'notes': 'Professional aggregated data'
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Wine-Searcher scraping error: {e}")
-            return None
-    
-    def _scrape_erobertparker(self, wine_name: str, vintage: int, grape_varietal: str,
-                             country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape eRobertParker.com for Wine Advocate critic reviews"""
-        try:
-            # Search via Google for Parker reviews
-            query = f'"{wine_name}" {vintage} site:erobertparker.com'
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.google.com/search?q={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Parker-style drinking window patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'anticipated maturity[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar for[:\s]+(\d+)\s*years',
-                r'ready in[:\s]+(\d+)\s*years',
-                r'best[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if 'years' in pattern:  # Convert years to date range
-                        years_from_vintage = int(match.group(1))
-                        start = vintage + max(1, years_from_vintage - 2)
-                        end = vintage + years_from_vintage + 8
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'high',
-                            'source': 'Robert Parker Wine Advocate',
-                            'notes': 'Professional critic assessment'
-                        }
-                    elif match.lastindex == 2:
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'high',
-                            'source': 'Robert Parker Wine Advocate',
-                            'notes': 'Professional critic assessment'
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"eRobertParker scraping error: {e}")
-            return None
-    
-    def _scrape_vinous(self, wine_name: str, vintage: int, grape_varietal: str,
-                      country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape Vinous.com for professional wine reviews"""
-        try:
-            query = f'"{wine_name}" {vintage} site:vinous.com'
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.google.com/search?q={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Vinous-style patterns
-            patterns = [
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best from[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'ready[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    start, end = int(match.group(1)), int(match.group(2))
-                    return {
-                        'drinking_window': f"{start}-{end}",
-                        'confidence': 'high',
-                        'source': 'Vinous',
-                        'notes': 'Professional wine critic review'
-                    }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Vinous scraping error: {e}")
-            return None
-    
-    def _scrape_jancisrobinson(self, wine_name: str, vintage: int, grape_varietal: str,
-                              country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape JancisRobinson.com for MW tasting notes"""
-        try:
-            query = f'"{wine_name}" {vintage} site:jancisrobinson.com'
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.google.com/search?q={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Jancis Robinson style patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'mature[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar until[:\s]+(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if match.lastindex == 2:
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'high',
-                            'source': 'Jancis Robinson',
-                            'notes': 'Master of Wine assessment'
-                        }
-                    else:
-                        end_year = int(match.group(1))
-                        start_year = max(vintage + 1, end_year - 10)
-                        return {
-                            'drinking_window': f"{start_year}-{end_year}",
-                            'confidence': 'medium',
-                            'source': 'Jancis Robinson',
-                            'notes': 'Estimated from cellar until date'
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Jancis Robinson scraping error: {e}")
-            return None
-    
-    def _scrape_vivino(self, wine_name: str, vintage: int, grape_varietal: str,
-                      country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape Vivino.com for user reviews and drinking suggestions"""
-        try:
-            query = f"{wine_name} {vintage}"
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.vivino.com/search/wines?q={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Vivino patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'ready[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    start, end = int(match.group(1)), int(match.group(2))
-                    return {
-                        'drinking_window': f"{start}-{end}",
-                        'confidence': 'medium',
-                        'source': 'Vivino',
-                        'notes': 'User community data'
-                    }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Vivino scraping error: {e}")
-            return None
-    
-    def _scrape_wine_com(self, wine_name: str, vintage: int, grape_varietal: str,
-                        country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape Wine.com for producer-provided drinking windows"""
-        try:
-            query = f"{wine_name} {vintage}"
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.wine.com/search/{encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Wine.com patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best consumed[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellaring potential[:\s]+(\d+)\s*years'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if 'years' in pattern:
-                        years = int(match.group(1))
-                        start = vintage + 2
-                        end = vintage + years
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'medium',
-                            'source': 'Wine.com',
-                            'notes': 'Producer-provided cellaring info'
-                        }
-                    else:
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'medium',
-                            'source': 'Wine.com',
-                            'notes': 'Commercial wine data'
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Wine.com scraping error: {e}")
-            return None
-    
-    def _scrape_decanter(self, wine_name: str, vintage: int, grape_varietal: str,
-                        country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape Decanter.com for professional drinking windows"""
-        try:
-            query = f'"{wine_name}" {vintage} site:decanter.com'
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.google.com/search?q={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Decanter patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar until[:\s]+(\d{4})',
-                r'ready[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if match.lastindex == 2:
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'medium',
-                            'source': 'Decanter',
-                            'notes': 'Wine magazine professional review'
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Decanter scraping error: {e}")
-            return None
-    
-    def _scrape_wine_spectator(self, wine_name: str, vintage: int, grape_varietal: str,
-                              country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape Wine Spectator for professional ratings and drinking windows"""
+
+    def _scrape(self, config: SourceConfig, wine_name: str, vintage: int) -> Optional[Window]:
+        """Fetch one source's page and extract a drinking window.
+
+        Every source follows the same shape -- build query, GET, strip
+        tags, scan for window patterns -- so the differences live in the
+        SOURCES table rather than nine copy-pasted methods."""
         try:
-            query = f'"{wine_name}" {vintage} site:winespectator.com'
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.google.com/search?q={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
+            query = config.query_template.format(wine=wine_name, vintage=vintage)
+            url = config.url_template.format(query=urllib.parse.quote(query))
+
+            response = self._get(url)
             if response.status_code != 200:
                 return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Wine Spectator patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'drinking window[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'best[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar until[:\s]+(\d{4})',
-                r'ready[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if match.lastindex == 2:
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'medium',
-                            'source': 'Wine Spectator',
-                            'notes': 'Professional wine magazine rating'
-                        }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Wine Spectator scraping error: {e}")
-            return None
-    
-    def _scrape_erobertparker(self, wine_name: str, vintage: int, grape_varietal: str,
-                             country: str, region: str, color: str) -> Optional[Dict]:
-        """Scrape eRobertParker.com for Wine Advocate critic reviews"""
-        try:
-            # Search via Google for Parker reviews
-            query = f'"{wine_name}" {vintage} site:erobertparker.com'
-            encoded_query = urllib.parse.quote(query)
-            url = f"https://www.google.com/search?q={encoded_query}"
-            
-            response = self.session.get(url, timeout=15)
-            if response.status_code != 200:
+
+            # Look for drinking window patterns in text; the patterns
+            # are IGNORECASE so no lowercased copy is needed
+            text_content = _TAG_STRIP_RE.sub(' ', response.text)
+
+            # Only the leftmost match matters, so stop after one
+            match = next(_scan(text_content, config.combined), None)
+            if match is None:
                 return None
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text().lower()
-            
-            # Parker-style drinking window patterns
-            patterns = [
-                r'drink[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'anticipated maturity[:\s]+(\d{4})\s*[-–]\s*(\d{4})',
-                r'cellar for[:\s]+(\d+)\s*years',
-                r'ready in[:\s]+(\d+)\s*years',
-                r'best[:\s]+(\d{4})\s*[-–]\s*(\d{4})'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    if 'years' in pattern:  # Convert years to date range
-                        years_from_vintage = int(match.group(1))
-                        start = vintage + max(1, years_from_vintage - 2)
-                        end = vintage + years_from_vintage + 8
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'high',
-                            'source': 'Robert Parker Wine Advocate',
-                            'notes': 'Professional critic assessment'
-                        }
-                    elif match.lastindex == 2:
-                        start, end = int(match.group(1)), int(match.group(2))
-                        return {
-                            'drinking_window': f"{start}-{end}",
-                            'confidence': 'high',
-                            'source': 'Robert Parker Wine Advocate',
-                            'notes': 'Professional critic assessment'
-                        }
-            
-            return None
-            
+
+            kind = config.kinds[match.lastgroup]
+            start, end = _KIND_WINDOWS[kind](_match_years(match), vintage)
+            confidence, notes = config.kind_results.get(
+                kind, (config.confidence, config.notes))
+            return Window(
+                drinking_window=f"{start}-{end}",
+                confidence=confidence,
+                source=config.display,
+                notes=notes,
+                peak_year=self._peak_year(start, end)
+            )
+
         except Exception as e:
-            print(f"eRobertParker scraping error: {e}")
+            print(f"{config.display} scraping error: {e}")
             return None
-    
+
     def _get_fallback_window(self, wine_name: str, vintage: int, grape_varietal: str,
-                           country: str, region: str, color: str) -> Dict:
+                           country: str, region: str, color: str) -> Window:
         """Comprehensive fallback rule engine based on wine characteristics"""
-        
-        wine_name_lower = wine_name.lower() if wine_name else ""
-        grape_lower = grape_varietal.lower() if grape_varietal else ""
-        region_lower = region.lower() if region else ""
-        country_lower = country.lower() if country else ""
-        
-        # Bordeaux First Growths - exceptional longevity
-        if any(name in wine_name_lower for name in [
-            'lafite', 'latour', 'margaux', 'mouton', 'haut-brion'
-        ]):
-            return {
-                'drinking_window': f"{vintage + 8}-{vintage + 40}",
-                'confidence': 'medium',
-                'source': 'Fallback Rules',
-                'notes': 'Bordeaux First Growth estimate'
-            }
-        
-        # Bordeaux Châteaux general
-        if wine_name_lower.startswith(('chateau', 'château')) or 'bordeaux' in region_lower:
-            if 'saint-emilion' in wine_name_lower or 'pomerol' in wine_name_lower:
-                return {
-                    'drinking_window': f"{vintage + 3}-{vintage + 20}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Right Bank Bordeaux estimate'
-                }
-            else:
-                return {
-                    'drinking_window': f"{vintage + 5}-{vintage + 25}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Left Bank Bordeaux estimate'
-                }
-        
-        # Burgundy
-        if 'domaine' in wine_name_lower and ('burgundy' in region_lower or 'bourgogne' in wine_name_lower):
-            if color == 'Red':
-                return {
-                    'drinking_window': f"{vintage + 3}-{vintage + 15}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Burgundy red wine estimate'
-                }
-            else:
-                return {
-                    'drinking_window': f"{vintage + 1}-{vintage + 8}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Burgundy white wine estimate'
-                }
-        
-        # Champagne
-        if 'champagne' in region_lower or 'champagne' in wine_name_lower:
-            return {
-                'drinking_window': f"{vintage + 3}-{vintage + 15}",
-                'confidence': 'medium',
-                'source': 'Fallback Rules',
-                'notes': 'Champagne estimate'
-            }
-        
-        # Italian wines
-        if country_lower == 'italy':
-            if 'barolo' in wine_name_lower or 'barbaresco' in wine_name_lower:
-                return {
-                    'drinking_window': f"{vintage + 5}-{vintage + 25}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Nebbiolo-based wine estimate'
-                }
-            elif 'brunello' in wine_name_lower:
-                return {
-                    'drinking_window': f"{vintage + 4}-{vintage + 20}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Brunello di Montalcino estimate'
-                }
-            elif 'chianti classico' in wine_name_lower:
-                return {
-                    'drinking_window': f"{vintage + 2}-{vintage + 12}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Chianti Classico estimate'
-                }
-        
-        # Spanish wines
-        if country_lower == 'spain' or any(spanish in wine_name_lower for spanish in ['vega sicilia', 'pesquera', 'aalto', 'pingus']):
-            if 'vega sicilia unico' in wine_name_lower:
-                return {
-                    'drinking_window': f"{vintage + 6}-{vintage + 30}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Vega Sicilia Unico - premium Spanish wine'
-                }
-            elif 'rioja' in wine_name_lower or 'rioja' in region_lower:
-                if 'gran reserva' in wine_name_lower:
-                    return {
-                        'drinking_window': f"{vintage + 4}-{vintage + 20}",
-                        'confidence': 'medium',
-                        'source': 'Fallback Rules',
-                        'notes': 'Rioja Gran Reserva estimate'
-                    }
-                elif 'reserva' in wine_name_lower:
-                    return {
-                        'drinking_window': f"{vintage + 3}-{vintage + 15}",
-                        'confidence': 'medium',
-                        'source': 'Fallback Rules',
-                        'notes': 'Rioja Reserva estimate'
-                    }
-                else:
-                    return {
-                        'drinking_window': f"{vintage + 2}-{vintage + 10}",
-                        'confidence': 'medium',
-                        'source': 'Fallback Rules',
-                        'notes': 'Rioja wine estimate'
-                    }
-            elif 'ribera del duero' in wine_name_lower or 'ribera del duero' in region_lower:
-                return {
-                    'drinking_window': f"{vintage + 4}-{vintage + 18}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Ribera del Duero estimate'
-                }
-            elif any(premium in wine_name_lower for premium in ['pingus', 'dominio de pingus', 'aalto', 'pesquera']):
-                return {
-                    'drinking_window': f"{vintage + 5}-{vintage + 25}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Premium Spanish wine estimate'
-                }
-            else:
-                return {
-                    'drinking_window': f"{vintage + 2}-{vintage + 12}",
-                    'confidence': 'medium',
-                    'source': 'Fallback Rules',
-                    'notes': 'Spanish red wine estimate'
-                }
-        
-        # Grape varietal-based rules
-        if grape_lower:
-            if 'cabernet sauvignon' in grape_lower:
-                if country_lower == 'usa':
-                    return {
-                        'drinking_window': f"{vintage + 3}-{vintage + 15}",
-                        'confidence': 'low',
-                        'source': 'Fallback Rules',
-                        'notes': 'US Cabernet Sauvignon estimate'
-                    }
-                else:
-                    return {
-                        'drinking_window': f"{vintage + 4}-{vintage + 18}",
-                        'confidence': 'low',
-                        'source': 'Fallback Rules',
-                        'notes': 'Cabernet Sauvignon general estimate'
-                    }
-            
-            elif 'pinot noir' in grape_lower:
-                return {
-                    'drinking_window': f"{vintage + 2}-{vintage + 10}",
-                    'confidence': 'low',
-                    'source': 'Fallback Rules',
-                    'notes': 'Pinot Noir estimate'
-                }
-            
-            elif 'merlot' in grape_lower:
-                return {
-                    'drinking_window': f"{vintage + 2}-{vintage + 12}",
-                    'confidence': 'low',
-                    'source': 'Fallback Rules',
-                    'notes': 'Merlot estimate'
-                }
-            
-            elif 'syrah' in grape_lower or 'shiraz' in grape_lower:
-                return {
-                    'drinking_window': f"{vintage + 3}-{vintage + 15}",
-                    'confidence': 'low',
-                    'source': 'Fallback Rules',
-                    'notes': 'Syrah/Shiraz estimate'
-                }
-            
-            elif 'chardonnay' in grape_lower:
-                if 'chablis' in wine_name_lower:
-                    return {
-                        'drinking_window': f"{vintage + 1}-{vintage + 8}",
-                        'confidence': 'low',
-                        'source': 'Fallback Rules',
-                        'notes': 'Chablis Chardonnay estimate'
-                    }
-                else:
-                    return {
-                        'drinking_window': f"{vintage + 1}-{vintage + 6}",
-                        'confidence': 'low',
-                        'source': 'Fallback Rules',
-                        'notes': 'Chardonnay general estimate'
-                    }
-            
-            elif 'sauvignon blanc' in grape_lower:
-                return {
-                    'drinking_window': f"{vintage}-{vintage + 4}",
-                    'confidence': 'low',
-                    'source': 'Fallback Rules',
-                    'notes': 'Sauvignon Blanc estimate'
-                }
-            
-            elif 'riesling' in grape_lower:
-                return {
-                    'drinking_window': f"{vintage + 1}-{vintage + 12}",
-                    'confidence': 'low',
-                    'source': 'Fallback Rules',
-                    'notes': 'Riesling estimate'
-                }
-        
-        # Basic color-based fallback
-        if color == 'Red':
-            return {
-                'drinking_window': f"{vintage + 2}-{vintage + 12}",
-                'confidence': 'low',
-                'source': 'Fallback Rules',
-                'notes': 'Generic red wine estimate'
-            }
-        elif color == 'White':
-            return {
-                'drinking_window': f"{vintage}-{vintage + 5}",
-                'confidence': 'low',
-                'source': 'Fallback Rules',
-                'notes': 'Generic white wine estimate'
-            }
-        
-        # Ultimate fallback
-        return {
-            'drinking_window': f"{vintage + 1}-{vintage + 8}",
-            'confidence': 'low',
-            'source': 'Fallback Rules',
-            'notes': 'Generic wine estimate'
-        }
-    
-    def _calculate_peak_year(self, drinking_window: str) -> Optional[int]:
-        """Calculate peak drinking year from window range"""
+
+        rule = _fallback_rule(
+            wine_name.lower() if wine_name else "",
+            grape_varietal.lower() if grape_varietal else "",
+            region.lower() if region else "",
+            country.lower() if country else "",
+            color or "",
+        )
+        start, end = vintage + rule.start, vintage + rule.end
+        return Window(
+            drinking_window=f"{start}-{end}",
+            confidence=rule.confidence,
+            source='Fallback Rules',
+            notes=rule.notes,
+            peak_year=self._peak_year(start, end)
+        )
+
+    @staticmethod
+    def _peak_year(start: int, end: int) -> int:
+        """Peak is typically in the first third of the drinking window"""
+        return start + (end - start) // 3
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _calculate_peak_year(drinking_window: str) -> Optional[int]:
+        """Calculate peak drinking year from a 'YYYY-YYYY' window string"""
         try:
-            if '-' in drinking_window:
-                start, end = map(int, drinking_window.split('-'))
-                # Peak is typically in first third of drinking window
-                peak = start + (end - start) // 3
-                return peak
-        except:
-            pass
-        return None
+            if len(drinking_window) != 9 or drinking_window[4] != '-':
+                return None
+            start = int(drinking_window[:4])
+            end = int(drinking_window[5:])
+        except (TypeError, ValueError):
+            return None
+        return DrinkingWindowService._peak_year(start, end)
 
 # Test the service
 if __name__ == "__main__":
@@ -836,6 +707,6 @@ if __name__ == "__main__":
     for wine_name, vintage in test_wines:
         print(f"\n--- Testing: {wine_name} {vintage} ---")
         result = service.get_drinking_window(wine_name, vintage)
-        for key, value in result.items():
+        for key, value in result.to_dict().items():
             print(f"{key}: {value}")
         print("---")
\ No newline at end of file
@@ -3,15 +3,67 @@
 Improved wine scraper using more reliable data sources
 """
 
+import functools
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import re
 from typing import Dict, List, Optional
 import time
 
+from wine_patterns import NAME_KEYWORD_MATCHERS
+
+# Grape/style keywords for the color fallback, as frozensets so the
+# check is a set intersection over the name's tokens instead of one
+# substring scan per keyword. Two-word grapes are matched as bigrams.
+_RED_KEYWORDS = frozenset({
+    'cabernet', 'merlot', 'pinot noir', 'syrah', 'shiraz', 'zinfandel',
+    'sangiovese',
+})
+_WHITE_KEYWORDS = frozenset({
+    'chardonnay', 'sauvignon blanc', 'riesling', 'pinot grigio', 'champagne',
+})
+_SPLIT_RE = re.compile(r'[^a-z0-9]+')
+
+def _name_grams(wine_name_lower: str) -> frozenset:
+    """Tokens plus adjacent-token bigrams of a lowercased wine name"""
+    tokens = [t for t in _SPLIT_RE.split(wine_name_lower) if t]
+    return frozenset(tokens).union(
+        f'{a} {b}' for a, b in zip(tokens, tokens[1:]))
+
+# Drinking-window offsets from vintage, dispatched on (color, name token);
+# (color, None) holds the per-color default when no token matches
+_WINDOW_RULES = {
+    ('Red', 'cabernet'): (3, 20),
+    ('Red', 'bordeaux'): (3, 20),
+    ('White', 'champagne'): (0, 8),
+    ('White', 'riesling'): (0, 8),
+    ('Red', None): (1, 10),
+    ('White', None): (0, 5),
+}
+
+def _first_keyword_info(text, pattern, groups):
+    """Info dict for the highest-priority keyword present in text"""
+    best = None
+    for match in pattern.finditer(text):
+        priority, info = groups[match.lastgroup]
+        if best is None or priority < best[0]:
+            best = (priority, info)
+    return best[1] if best else None
+
 class ImprovedWineScraper:
     def __init__(self):
+        # Pooled session so concurrent scrapes reuse TCP/TLS connections
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -27,25 +79,29 @@ class ImprovedWineScraper:
             'ratings': []
         }
         
-        # Try different approaches in order of reliability
-        sources = [
+        # Try the real sources in order of reliability, returning as soon
+        # as the merged data is sufficient; sufficiency is only re-checked
+        # after a source actually contributed something
+        sources = (
             self._try_wine_api,
             self._try_wine_searcher,
             self._try_educated_guess,
-            self._get_fallback_data
-        ]
-        
+        )
+
         for source_method in sources:
             try:
                 result = source_method(wine_name, vintage)
-                if result and any(result.values()):
-                    wine_data.update({k: v for k, v in result.items() if v is not None})
-                    if self._has_sufficient_data(wine_data):
-                        break
             except Exception as e:
                 print(f"Source failed: {e}")
                 continue
-        
+            if result and any(result.values()):
+                wine_data.update({k: v for k, v in result.items() if v is not None})
+                if self._has_sufficient_data(wine_data):
+                    return wine_data
+
+        # Fallback is always conclusive, so it only runs when the real
+        # sources left the data insufficient
+        wine_data.update(self._get_fallback_data(wine_name, vintage))
         return wine_data
     
     def _has_sufficient_data(self, data: Dict) -> bool:
@@ -81,105 +137,57 @@ class ImprovedWineScraper:
         """Make educated guesses based on wine name patterns"""
         wine_name_lower = wine_name.lower()
         result = {}
-        
-        # More sophisticated wine name analysis
-        wine_patterns = {
-            # Grape varietals
-            'cabernet sauvignon': {'color': 'Red', 'grape_varietal': 'Cabernet Sauvignon'},
-            'chardonnay': {'color': 'White', 'grape_varietal': 'Chardonnay'},
-            'pinot noir': {'color': 'Red', 'grape_varietal': 'Pinot Noir'},
-            'sauvignon blanc': {'color': 'White', 'grape_varietal': 'Sauvignon Blanc'},
-            'merlot': {'color': 'Red', 'grape_varietal': 'Merlot'},
-            'riesling': {'color': 'White', 'grape_varietal': 'Riesling'},
-            'syrah': {'color': 'Red', 'grape_varietal': 'Syrah'},
-            'shiraz': {'color': 'Red', 'grape_varietal': 'Shiraz'},
-            'pinot grigio': {'color': 'White', 'grape_varietal': 'Pinot Grigio'},
-            'sangiovese': {'color': 'Red', 'grape_varietal': 'Sangiovese'},
-        }
-        
-        # Region patterns
-        region_patterns = {
-            'napa': {'country': 'USA', 'region': 'Napa Valley'},
-            'sonoma': {'country': 'USA', 'region': 'Sonoma County'},
-            'bordeaux': {'country': 'France', 'region': 'Bordeaux'},
-            'burgundy': {'country': 'France', 'region': 'Burgundy'},
-            'champagne': {'country': 'France', 'region': 'Champagne'},
-            'chianti': {'country': 'Italy', 'region': 'Chianti'},
-            'tuscany': {'country': 'Italy', 'region': 'Tuscany'},
-            'barossa': {'country': 'Australia', 'region': 'Barossa Valley'},
-            'rioja': {'country': 'Spain', 'region': 'Rioja'},
-            'mendoza': {'country': 'Argentina', 'region': 'Mendoza'},
-            'willamette': {'country': 'USA', 'region': 'Willamette Valley'},
-            'alexander valley': {'country': 'USA', 'region': 'Alexander Valley'},
-        }
-        
-        # Producer patterns (known wineries and their typical regions)
-        producer_patterns = {
-            'caymus': {'country': 'USA', 'region': 'Napa Valley'},
-            'opus one': {'country': 'USA', 'region': 'Napa Valley'},
-            'silver oak': {'country': 'USA', 'region': 'Alexander Valley'},
-            'dom perignon': {'country': 'France', 'region': 'Champagne', 'color': 'White'},
-            'kendall-jackson': {'country': 'USA', 'region': 'California'},
-            'veuve clicquot': {'country': 'France', 'region': 'Champagne', 'color': 'White'},
-            'louis jadot': {'country': 'France', 'region': 'Burgundy'},
-            'antinori': {'country': 'Italy', 'region': 'Tuscany'},
-        }
-        
-        # Check for grape varietals
-        for varietal, info in wine_patterns.items():
-            if varietal in wine_name_lower:
-                result.update(info)
-                break
-        
-        # Check for regions
-        for region, info in region_patterns.items():
-            if region in wine_name_lower:
-                result.update(info)
-                break
-        
-        # Check for known producers
-        for producer, info in producer_patterns.items():
-            if producer in wine_name_lower:
+
+        # Scan the name once per table: varietals, then regions, then
+        # producers, with later tables allowed to refine earlier fields
+        for pattern, groups in NAME_KEYWORD_MATCHERS:
+            info = _first_keyword_info(wine_name_lower, pattern, groups)
+            if info:
                 result.update(info)
-                break
-        
-        # Generate drinking window based on wine type and vintage
-        if result.get('color') == 'Red':
-            if 'cabernet' in wine_name_lower or 'bordeaux' in wine_name_lower:
-                result['drinking_window'] = f"{vintage + 3}-{vintage + 20}"
-            else:
-                result['drinking_window'] = f"{vintage + 1}-{vintage + 10}"
-        elif result.get('color') == 'White':
-            if 'champagne' in wine_name_lower or 'riesling' in wine_name_lower:
-                result['drinking_window'] = f"{vintage}-{vintage + 8}"
-            else:
-                result['drinking_window'] = f"{vintage}-{vintage + 5}"
-        
+
+        # Generate drinking window via the rules table: tokenize the name
+        # once and hash-look-up (color, token) pairs instead of branching
+        color = result.get('color')
+        if (color, None) in _WINDOW_RULES:
+            start, end = next(
+                (_WINDOW_RULES[(color, token)]
+                 for token in _name_grams(wine_name_lower)
+                 if (color, token) in _WINDOW_RULES),
+                _WINDOW_RULES[(color, None)])
+            result['drinking_window'] = f"{vintage + start}-{vintage + end}"
+
         return result if result else None
     
     def _get_fallback_data(self, wine_name: str, vintage: int) -> Dict:
         """Fallback data based on wine name analysis"""
-        wine_name_lower = wine_name.lower()
-        
-        # Determine color based on common patterns
-        if any(word in wine_name_lower for word in ['cabernet', 'merlot', 'pinot noir', 'syrah', 'shiraz', 'zinfandel', 'sangiovese']):
-            color = 'Red'
-            drinking_window = f"{vintage + 2}-{vintage + 12}"
-        elif any(word in wine_name_lower for word in ['chardonnay', 'sauvignon blanc', 'riesling', 'pinot grigio', 'champagne']):
-            color = 'White'
-            drinking_window = f"{vintage}-{vintage + 6}"
-        else:
-            color = 'Red'  # Default assumption
-            drinking_window = f"{vintage + 1}-{vintage + 10}"
-        
-        return {
-            'color': color,
-            'drinking_window': drinking_window,
-            'country': 'Unknown',
-            'region': 'Unknown',
-            'grape_varietal': 'Mixed',
-            'ratings': []  # No fake ratings
-        }
+        data = _fallback_data(wine_name.lower(), vintage)
+        # Copy so callers can't mutate the memoized entry
+        return {**data, 'ratings': []}
+
+@functools.lru_cache(maxsize=4096)
+def _fallback_data(wine_name_lower: str, vintage: int) -> Dict:
+    """Memoized fallback per (name, vintage); treat the result as immutable"""
+    grams = _name_grams(wine_name_lower)
+
+    # Determine color based on common patterns
+    if grams & _RED_KEYWORDS:
+        color = 'Red'
+        drinking_window = f"{vintage + 2}-{vintage + 12}"
+    elif grams & _WHITE_KEYWORDS:
+        color = 'White'
+        drinking_window = f"{vintage}-{vintage + 6}"
+    else:
+        color = 'Red'  # Default assumption
+        drinking_window = f"{vintage + 1}-{vintage + 10}"
+
+    return {
+        'color': color,
+        'drinking_window': drinking_window,
+        'country': 'Unknown',
+        'region': 'Unknown',
+        'grape_varietal': 'Mixed',
+        'ratings': ()  # No fake ratings
+    }
 
 # Example usage and testing
 if __name__ == "__main__":
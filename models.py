@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, text
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -10,11 +11,11 @@ class Store(db.Model):
 
 class Wine(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False)
-    vintage = db.Column(db.Integer, nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False)
-    cellar_name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(200), nullable=False, index=True)
+    vintage = db.Column(db.Integer, nullable=False, index=True)
+    price = db.Column(db.Float, nullable=False, index=True)
+    store_id = db.Column(db.Integer, db.ForeignKey('store.id'), nullable=False, index=True)
+    cellar_name = db.Column(db.String(100), nullable=False, index=True)
     rack_number = db.Column(db.String(20), nullable=False)
     
     # Auto-populated fields from web scraping
@@ -23,7 +24,7 @@ class Wine(db.Model):
     country = db.Column(db.String(100))
     region = db.Column(db.String(100))
     grape_varietal = db.Column(db.String(200))
-    ratings_summary = db.Column(db.Float)  # Average of up to 4 ratings
+    ratings_summary = db.Column(db.Float, index=True)  # Average of up to 4 ratings
     
     # Enhanced drinking window tracking
     drinking_window_confidence = db.Column(db.String(10))  # 'high', 'medium', 'low'
@@ -31,12 +32,26 @@ class Wine(db.Model):
     peak_drinking_year = db.Column(db.Integer)  # Calculated from window
     window_notes = db.Column(db.String(200))  # Additional context
     
-    # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Timestamps: defaults computed by the database so bulk inserts don't
+    # pay a Python datetime call per row. SQLite has no ON UPDATE clause,
+    # so updated_at keeps the Python-side onupdate for ORM updates.
+    created_at = db.Column(db.DateTime, server_default=func.now(), nullable=False)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=datetime.utcnow, nullable=False)
     
     ratings = db.relationship('WineRating', backref='wine', lazy=True, cascade='all, delete-orphan')
 
+    # Composite index covering the common color-filter + name-sort path in /collection,
+    # plus a partial index so scrape_existing_wines can find wines with missing
+    # data without scanning fully-populated rows
+    __table_args__ = (
+        db.Index('ix_wine_color_name', 'color', 'name'),
+        db.Index(
+            'ix_wine_needs_scrape', 'id',
+            sqlite_where=text(
+                'color IS NULL OR country IS NULL OR '
+                'grape_varietal IS NULL OR drinking_window IS NULL')),
+    )
+
 class WineRating(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     wine_id = db.Column(db.Integer, db.ForeignKey('wine.id'), nullable=False)
@@ -3,98 +3,167 @@
 Script to trigger web scraping for existing wines that don't have complete data
 """
 
-from app import app, db
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import app, db, compute_ratings_summary
 from models import Wine, WineRating
 from trusted_wine_scraper import TrustedWineScraper
 
+# Wines to accumulate before flushing one batched transaction
+BATCH_SIZE = 500
+
+# Concurrent scrape lookups; the scraper's pooled session is thread-safe
+SCRAPE_WORKERS = 16
+
 def scrape_existing_wines():
     """Scrape data for existing wines that are missing information"""
     with app.app_context():
         scraper = TrustedWineScraper()
         
-        # Find wines that need scraping (missing color, region, etc.)
-        wines_to_scrape = Wine.query.filter(
-            (Wine.color == None) | 
-            (Wine.country == None) | 
+        # Find wines that need scraping (missing color, region, etc.).
+        # Only the three columns the loop reads are selected, streamed in
+        # chunks, so no full ORM objects are hydrated for the hot path
+        wines_to_scrape = db.session.query(
+            Wine.id, Wine.name, Wine.vintage
+        ).filter(
+            (Wine.color == None) |
+            (Wine.country == None) |
             (Wine.grape_varietal == None) |
             (Wine.drinking_window == None)
-        ).all()
+        ).yield_per(500)
         
-        print(f"Found {len(wines_to_scrape)} wines that need data scraping...")
-        
-        for i, wine in enumerate(wines_to_scrape, 1):
-            print(f"\n[{i}/{len(wines_to_scrape)}] Scraping data for: {wine.name} {wine.vintage}")
-            
-            try:
-                # First try real web scraping
-                wine_data = scraper.search_wine_data(wine.name, wine.vintage)
-                
-                # If no data found, use mock data for demonstration
-                if not any(wine_data.values()):
-                    print("  → No web data found, using mock data for demonstration")
-                    wine_data = scraper.get_mock_wine_data(wine.name, wine.vintage)
-                else:
-                    print("  → Found web data!")
-                
-                # Update wine with scraped data
-                if wine_data.get('drinking_window'):
-                    wine.drinking_window = wine_data['drinking_window']
-                    print(f"  → Drinking window: {wine.drinking_window}")
-                
-                if wine_data.get('color'):
-                    wine.color = wine_data['color']
-                    print(f"  → Color: {wine.color}")
-                
-                if wine_data.get('country'):
-                    wine.country = wine_data['country']
-                    print(f"  → Country: {wine.country}")
-                
-                if wine_data.get('region'):
-                    wine.region = wine_data['region']
-                    print(f"  → Region: {wine.region}")
-                
-                if wine_data.get('grape_varietal'):
-                    wine.grape_varietal = wine_data['grape_varietal']
-                    print(f"  → Grape: {wine.grape_varietal}")
-                
-                # Add ratings if found
-                ratings = wine_data.get('ratings', [])
-                if ratings:
-                    # Clear existing ratings for this wine
-                    WineRating.query.filter_by(wine_id=wine.id).delete()
-                    
-                    total_rating = 0
-                    count = 0
-                    
-                    for rating_data in ratings:
-                        rating = WineRating(
-                            wine_id=wine.id,
-                            source=rating_data['source'],
-                            rating=rating_data['rating'],
-                            max_rating=rating_data['max_rating']
-                        )
-                        db.session.add(rating)
-                        
-                        # Normalize rating to 100 scale for average
-                        normalized_rating = (rating_data['rating'] / rating_data['max_rating']) * 100
-                        total_rating += normalized_rating
-                        count += 1
-                        
-                        print(f"  → {rating_data['source']}: {rating_data['rating']}/{rating_data['max_rating']}")
-                    
-                    if count > 0:
-                        wine.ratings_summary = round(total_rating / count, 1)
-                        print(f"  → Summary rating: {wine.ratings_summary}/100")
+        # Accumulate changes and write them in batches: one transaction
+        # (and one SQLite fsync) per BATCH_SIZE wines instead of per wine
+        updates = []
+        new_ratings = []
+        rated_wine_ids = []
+
+        def flush_batch():
+            """Apply the accumulated updates in a single transaction"""
+            if updates:
+                db.session.bulk_update_mappings(Wine, updates)
+            if rated_wine_ids:
+                # Replace existing ratings for every rated wine at once
+                db.session.execute(WineRating.__table__.delete().where(
+                    WineRating.wine_id.in_(rated_wine_ids)))
+                db.session.bulk_insert_mappings(WineRating, new_ratings)
+            db.session.commit()
+            updates.clear()
+            new_ratings.clear()
+            rated_wine_ids.clear()
+
+        # Fan the network-bound lookups out across worker threads; all DB
+        # work stays on this thread so the SQLAlchemy session is never
+        # touched concurrently
+        # Scrape each distinct (name, vintage) once; duplicate bottles of
+        # the same wine (other stores / racks) reuse the first result
+        bottles = {}
+        for wine_id, name, vintage in wines_to_scrape:
+            bottles.setdefault((name.lower(), vintage), []).append((wine_id, name, vintage))
+
+        with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as pool:
+            futures = {
+                pool.submit(scraper.search_wine_data, rows[0][1], rows[0][2]): rows
+                for rows in bottles.values()
+            }
+            total = len(futures)
+            bottle_count = sum(len(rows) for rows in futures.values())
+            print(f"Found {bottle_count} wines ({total} distinct) that need data scraping...")
+            for i, future in enumerate(as_completed(futures), 1):
+                rows = futures[future]
+                wine_id, name, vintage = rows[0]
+                dupe_note = f" (x{len(rows)} bottles)" if len(rows) > 1 else ""
+                print(f"\n[{i}/{total}] Scraping data for: {name} {vintage}{dupe_note}")
+
+                try:
+                    wine_data = future.result()
+
+                    # If no data found, use mock data for demonstration
+                    if not any(wine_data.values()):
+                        print("  → No web data found, using mock data for demonstration")
+                        wine_data = scraper.get_mock_wine_data(name, vintage)
+                    else:
+                        print("  → Found web data!")
                 
-                db.session.commit()
-                print("  ✅ Updated successfully!")
+                    # Collect the new column values once per distinct wine
+                    fields = {}
+                    if wine_data.get('drinking_window'):
+                        fields['drinking_window'] = wine_data['drinking_window']
+                        print(f"  → Drinking window: {fields['drinking_window']}")
+
+                    if wine_data.get('color'):
+                        fields['color'] = wine_data['color']
+                        print(f"  → Color: {fields['color']}")
+
+                    if wine_data.get('country'):
+                        fields['country'] = wine_data['country']
+                        print(f"  → Country: {fields['country']}")
+
+                    if wine_data.get('region'):
+                        fields['region'] = wine_data['region']
+                        print(f"  → Region: {fields['region']}")
+
+                    if wine_data.get('grape_varietal'):
+                        fields['grape_varietal'] = wine_data['grape_varietal']
+                        print(f"  → Grape: {fields['grape_varietal']}")
+
+                    ratings = wine_data.get('ratings', [])
+                    if ratings:
+                        for rating_data in ratings:
+                            print(f"  → {rating_data['source']}: {rating_data['rating']}/{rating_data['max_rating']}")
+
+                        summary = compute_ratings_summary(ratings)
+                        if summary is not None:
+                            fields['ratings_summary'] = summary
+                            print(f"  → Summary rating: {fields['ratings_summary']}/100")
+
+                    # bulk_update_mappings bypasses the Python-side
+                    # onupdate on Wine.updated_at, so bump it here
+                    if fields:
+                        fields['updated_at'] = datetime.utcnow()
+
+                    # Queue the same result for every duplicate bottle;
+                    # each bottle row keeps its own rating rows
+                    for dupe_id, _, _ in rows:
+                        if fields:
+                            updates.append({'id': dupe_id, **fields})
+                        if ratings:
+                            rated_wine_ids.append(dupe_id)
+                            new_ratings.extend({
+                                'wine_id': dupe_id,
+                                'source': rating_data['source'],
+                                'rating': rating_data['rating'],
+                                'max_rating': rating_data['max_rating']
+                            } for rating_data in ratings)
+                    if len(updates) >= BATCH_SIZE:
+                        flush_batch()
+                    print("  ✅ Queued for update!")
                 
-            except Exception as e:
-                print(f"  ❌ Error scraping {wine.name}: {e}")
-                continue
+                except Exception as e:
+                    print(f"  ❌ Error scraping {name}: {e}")
+                    continue
         
-        print(f"\n🍷 Scraping completed! Updated {len(wines_to_scrape)} wines.")
+        flush_batch()
+        print(f"\n🍷 Scraping completed! Updated {bottle_count} wines.")
         print("You can now view your collection to see the enriched wine data.")
 
+def recompute_all_summaries():
+    """Rebuild ratings_summary for every wine in one aggregated UPDATE"""
+    with app.app_context():
+        db.session.execute(text("""
+            UPDATE wine SET ratings_summary = ROUND((
+                SELECT AVG(rating * 100.0 / max_rating)
+                FROM wine_rating WHERE wine_rating.wine_id = wine.id
+            ), 1)
+            WHERE EXISTS (
+                SELECT 1 FROM wine_rating WHERE wine_rating.wine_id = wine.id
+            )
+        """))
+        db.session.commit()
+        print("🍷 Recomputed ratings summaries for all wines.")
+
 if __name__ == "__main__":
     scrape_existing_wines()
\ No newline at end of file
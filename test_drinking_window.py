@@ -43,11 +43,11 @@ def test_service():
             color=color
         )
         
-        print(f"Drinking Window: {result['drinking_window']}")
-        print(f"Peak Year: {result.get('peak_year', 'N/A')}")
-        print(f"Confidence: {result['confidence']}")
-        print(f"Source: {result['source']}")
-        print(f"Notes: {result['notes']}")
+        print(f"Drinking Window: {result.drinking_window}")
+        print(f"Peak Year: {result.peak_year if result.peak_year is not None else 'N/A'}")
+        print(f"Confidence: {result.confidence}")
+        print(f"Source: {result.source}")
+        print(f"Notes: {result.notes}")
         print("-" * 60)
         print()
 
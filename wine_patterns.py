@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Shared keyword tables and fused matchers for the wine scrapers
+
+Two kinds of detection live here: page-text tables that classify scraped
+search-result text (used by TrustedWineScraper) and wine-name tables
+that guess attributes from the bottle's name (used by
+ImprovedWineScraper). Everything is fused and compiled once at import
+so every scraper instance reuses the same matchers.
+"""
+
+import re
+
+# ---------------------------------------------------------------------------
+# Page-text detection tables
+# ---------------------------------------------------------------------------
+
+# Color detection - look for specific phrases
+COLOR_PATTERNS = {
+    'red wine': 'Red',
+    'red bordeaux': 'Red',
+    'cabernet sauvignon': 'Red',
+    'merlot': 'Red',
+    'pinot noir': 'Red',
+    'syrah': 'Red',
+    'shiraz': 'Red',
+    'tempranillo': 'Red',
+    'sangiovese': 'Red',
+    'white wine': 'White',
+    'chardonnay': 'White',
+    'sauvignon blanc': 'White',
+    'riesling': 'White',
+    'pinot grigio': 'White',
+    'gewürztraminer': 'White',
+    'champagne': 'White',
+    'sparkling': 'White'
+}
+
+# Region detection with more specific patterns
+REGION_PATTERNS = [
+    # French regions
+    (r'bordeaux', ('France', 'Bordeaux')),
+    (r'burgundy', ('France', 'Burgundy')),
+    (r'champagne', ('France', 'Champagne')),
+    (r'rhône|rhone', ('France', 'Rhône Valley')),
+    (r'loire', ('France', 'Loire Valley')),
+    (r'alsace', ('France', 'Alsace')),
+    (r'languedoc', ('France', 'Languedoc')),
+
+    # California regions
+    (r'napa valley', ('USA', 'Napa Valley')),
+    (r'sonoma', ('USA', 'Sonoma County')),
+    (r'alexander valley', ('USA', 'Alexander Valley')),
+    (r'russian river', ('USA', 'Russian River Valley')),
+    (r'santa barbara', ('USA', 'Santa Barbara County')),
+    (r'paso robles', ('USA', 'Paso Robles')),
+
+    # Italian regions
+    (r'tuscany|toscana', ('Italy', 'Tuscany')),
+    (r'piedmont|piemonte', ('Italy', 'Piedmont')),
+    (r'veneto', ('Italy', 'Veneto')),
+    (r'chianti', ('Italy', 'Chianti')),
+
+    # Spanish regions
+    (r'rioja', ('Spain', 'Rioja')),
+    (r'ribera del duero', ('Spain', 'Ribera del Duero')),
+
+    # German regions
+    (r'mosel', ('Germany', 'Mosel')),
+    (r'rheingau', ('Germany', 'Rheingau')),
+
+    # Australian regions
+    (r'barossa', ('Australia', 'Barossa Valley')),
+    (r'hunter valley', ('Australia', 'Hunter Valley')),
+    (r'margaret river', ('Australia', 'Margaret River')),
+
+    # Other regions
+    (r'mendoza', ('Argentina', 'Mendoza')),
+    (r'maipo', ('Chile', 'Maipo Valley')),
+    (r'stellenbosch', ('South Africa', 'Stellenbosch')),
+]
+
+# Grape varietal detection
+VARIETAL_PATTERNS = {
+    'cabernet sauvignon': 'Cabernet Sauvignon',
+    'merlot': 'Merlot',
+    'pinot noir': 'Pinot Noir',
+    'syrah': 'Syrah',
+    'shiraz': 'Shiraz',
+    'chardonnay': 'Chardonnay',
+    'sauvignon blanc': 'Sauvignon Blanc',
+    'riesling': 'Riesling',
+    'pinot grigio': 'Pinot Grigio',
+    'sangiovese': 'Sangiovese',
+    'tempranillo': 'Tempranillo',
+    'nebbiolo': 'Nebbiolo',
+    'grenache': 'Grenache',
+    'bordeaux blend': 'Bordeaux Blend'
+}
+
+def _fuse_search_table(entries):
+    """Fuse one table's patterns into an alternation plus a
+    group -> (table priority, value) map.
+
+    Longest-first ordering so overlapping keywords within the table
+    prefer the longer match; the lowest priority seen anywhere on the
+    page wins, matching the original first-table-entry-present loops.
+    Tables are fused separately because a single cross-table scan is
+    non-overlapping: e.g. consuming 'red bordeaux' for color would hide
+    the varietal 'bordeaux blend' starting inside that span."""
+    parts = []
+    groups = {}
+    ordered = sorted(enumerate(entries), key=lambda item: -len(item[1][0]))
+    for i, (priority, (pattern, value)) in enumerate(ordered):
+        name = f'k{i}'
+        parts.append(f'(?P<{name}>{pattern})')
+        groups[name] = (priority, value)
+    return re.compile('|'.join(parts)), groups
+
+# (field, pattern, groups) per table; field names the wine attribute the
+# table's values feed ('region' values are (country, region) pairs)
+SEARCH_MATCHERS = (
+    ('color', *_fuse_search_table(
+        [(re.escape(k), v) for k, v in COLOR_PATTERNS.items()])),
+    ('region', *_fuse_search_table(REGION_PATTERNS)),
+    ('varietal', *_fuse_search_table(
+        [(re.escape(k), v) for k, v in VARIETAL_PATTERNS.items()])),
+)
+
+# Drinking-window phrases fused into one alternation: one scan over the
+# page instead of an anchor check plus regex per phrase. Groups 1/2 hold
+# a year range, group 3 a lone 'cellar until' year. The leftmost phrase
+# on the page wins, where the old per-pattern loop preferred 'drink'
+# phrasing regardless of position. The quantifiers are possessive
+# (Python 3.11+): each is followed by a disjoint token, so giving back
+# characters can never help, and cutting the backtracking keeps scan
+# time linear even on noisy page text
+DRINK_RE = re.compile(
+    r'(?:drinking window[:\s]++|drink |best |mature )(\d{4})[- ]?+(?:to )?+(\d{4})'
+    r'|cellar until (\d{4})')
+
+# ---------------------------------------------------------------------------
+# Wine-name guessing tables
+# ---------------------------------------------------------------------------
+
+NAME_VARIETAL_PATTERNS = {
+    'cabernet sauvignon': {'color': 'Red', 'grape_varietal': 'Cabernet Sauvignon'},
+    'chardonnay': {'color': 'White', 'grape_varietal': 'Chardonnay'},
+    'pinot noir': {'color': 'Red', 'grape_varietal': 'Pinot Noir'},
+    'sauvignon blanc': {'color': 'White', 'grape_varietal': 'Sauvignon Blanc'},
+    'merlot': {'color': 'Red', 'grape_varietal': 'Merlot'},
+    'riesling': {'color': 'White', 'grape_varietal': 'Riesling'},
+    'syrah': {'color': 'Red', 'grape_varietal': 'Syrah'},
+    'shiraz': {'color': 'Red', 'grape_varietal': 'Shiraz'},
+    'pinot grigio': {'color': 'White', 'grape_varietal': 'Pinot Grigio'},
+    'sangiovese': {'color': 'Red', 'grape_varietal': 'Sangiovese'},
+}
+
+NAME_REGION_PATTERNS = {
+    'napa': {'country': 'USA', 'region': 'Napa Valley'},
+    'sonoma': {'country': 'USA', 'region': 'Sonoma County'},
+    'bordeaux': {'country': 'France', 'region': 'Bordeaux'},
+    'burgundy': {'country': 'France', 'region': 'Burgundy'},
+    'champagne': {'country': 'France', 'region': 'Champagne'},
+    'chianti': {'country': 'Italy', 'region': 'Chianti'},
+    'tuscany': {'country': 'Italy', 'region': 'Tuscany'},
+    'barossa': {'country': 'Australia', 'region': 'Barossa Valley'},
+    'rioja': {'country': 'Spain', 'region': 'Rioja'},
+    'mendoza': {'country': 'Argentina', 'region': 'Mendoza'},
+    'willamette': {'country': 'USA', 'region': 'Willamette Valley'},
+    'alexander valley': {'country': 'USA', 'region': 'Alexander Valley'},
+}
+
+# Known producers and their typical regions
+NAME_PRODUCER_PATTERNS = {
+    'caymus': {'country': 'USA', 'region': 'Napa Valley'},
+    'opus one': {'country': 'USA', 'region': 'Napa Valley'},
+    'silver oak': {'country': 'USA', 'region': 'Alexander Valley'},
+    'dom perignon': {'country': 'France', 'region': 'Champagne', 'color': 'White'},
+    'kendall-jackson': {'country': 'USA', 'region': 'California'},
+    'veuve clicquot': {'country': 'France', 'region': 'Champagne', 'color': 'White'},
+    'louis jadot': {'country': 'France', 'region': 'Burgundy'},
+    'antinori': {'country': 'Italy', 'region': 'Tuscany'},
+}
+
+def _fuse_keywords(table):
+    """Fuse a keyword table into one alternation plus per-group (table
+    priority, info) metadata, so a wine name is scanned once instead of
+    once per keyword"""
+    parts = []
+    groups = {}
+    for priority, (keyword, info) in enumerate(table.items()):
+        name = f'k{priority}'
+        parts.append(f'(?P<{name}>{re.escape(keyword)})')
+        groups[name] = (priority, info)
+    return re.compile('|'.join(parts)), groups
+
+NAME_KEYWORD_MATCHERS = tuple(
+    _fuse_keywords(table)
+    for table in (NAME_VARIETAL_PATTERNS, NAME_REGION_PATTERNS, NAME_PRODUCER_PATTERNS)
+)
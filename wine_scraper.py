@@ -1,5 +1,5 @@
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
 import re
 from typing import Dict, List, Optional
 import time
@@ -50,10 +50,9 @@ class WineScraper:
             response = self.session.get(search_url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract information from search results
-            text_content = soup.get_text().lower()
+            # Extract information from search results; lxml builds the
+            # tree and walks the text in C
+            text_content = lxml.html.fromstring(response.content).text_content().lower()
             
             # Simple pattern matching for wine characteristics
             wine_info = {}